@@ -0,0 +1,173 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+AOT-компилированное ядро перебора для курсача: та же логика, что и в
+numba-ядре, но без штрафа на импорт и первую компиляцию.
+
+Сборка: python setup.py build_ext --inplace
+"""
+
+from libc.stdlib cimport calloc, malloc, free as c_free
+
+# Ходы пони: конь + верблюд (в том же порядке, что PONY_MOVES)
+cdef int[16] _DX = [1, 2, -1, -2, 1, 2, -1, -2, 1, 3, -1, -3, 1, 3, -1, -3]
+cdef int[16] _DY = [2, 1, 2, 1, -2, -1, -2, -1, 3, 1, 3, 1, -3, -1, -3, -1]
+
+
+def solve(initial, int N, int L, bint restrict_first,
+          int root_lo, int root_hi, cancel=None):
+    """
+    Ищет размещение L пони на доске NxN при начальных координатах initial.
+
+    :param initial: Список пар (x, y) уже размещенных пони
+
+    :param N: Размер доски
+
+    :param L: Количество дополнительных пони
+
+    :param restrict_first: Искать первого пони только в левой верхней
+        четверти (симметрия D4, допустимо лишь при пустом initial)
+
+    :param root_lo: Нижняя граница клетки первого авто-пони (x*N+y)
+
+    :param root_hi: Верхняя граница (не включая) клетки первого авто-пони
+
+    :param cancel: Однобайтовый буфер флага отмены или None
+
+    :return: Список координат дополнительных пони или None
+
+    """
+    cdef int size = N * N
+    cdef unsigned char[:] cancel_flag = \
+        cancel if cancel is not None else bytearray(1)
+
+    # counts[s] — сколько пони занимают или атакуют клетку s
+    cdef unsigned short *counts = <unsigned short *> calloc(
+        size, sizeof(unsigned short))
+    cdef long *stack = <long *> malloc((L if L > 0 else 1) * sizeof(long))
+
+    cdef int free_cells = size
+    cdef int depth, i, limit, x, y, nx, ny, s, m, k, d
+    cdef bint found = False
+
+    if counts == NULL or stack == NULL:
+        if counts != NULL:
+            c_free(counts)
+        if stack != NULL:
+            c_free(stack)
+        raise MemoryError()
+
+    try:
+        for x, y in initial:
+            s = x * N + y
+            counts[s] += 1
+
+            if counts[s] == 1:
+                free_cells -= 1
+
+            for m in range(16):
+                nx = x + _DX[m]
+                ny = y + _DY[m]
+
+                if 0 <= nx < N and 0 <= ny < N:
+                    s = nx * N + ny
+                    counts[s] += 1
+
+                    if counts[s] == 1:
+                        free_cells -= 1
+
+        if L == 0:
+            return []
+
+        depth = 0
+        i = root_lo
+
+        # сам перебор — чистый C: GIL отпускается, чтобы не блокировать
+        # GUI-поток и параллельных воркеров пула
+        with nogil:
+            while True:
+                if cancel_flag[0] != 0:
+                    break
+
+                # оставшихся клеток должно хватить на недостающих пони
+                limit = size - L + depth + 1
+
+                # первый авто-пони ограничен своим диапазоном корней
+                if depth == 0 and limit > root_hi:
+                    limit = root_hi
+
+                # свободных клеток меньше, чем недостающих пони — откат
+                if free_cells < L - depth:
+                    i = limit
+
+                while i < limit:
+                    if counts[i] == 0:
+                        # симметрия D4: первого пони достаточно искать
+                        # в левой верхней четверти доски
+                        if depth > 0 or not restrict_first:
+                            break
+
+                        if (i // N) * 2 <= N - 1 and (i % N) * 2 <= N - 1:
+                            break
+
+                    i += 1
+
+                if i < limit:
+                    x = i // N
+                    y = i % N
+                    counts[i] += 1
+
+                    if counts[i] == 1:
+                        free_cells -= 1
+
+                    for m in range(16):
+                        nx = x + _DX[m]
+                        ny = y + _DY[m]
+
+                        if 0 <= nx < N and 0 <= ny < N:
+                            s = nx * N + ny
+                            counts[s] += 1
+
+                            if counts[s] == 1:
+                                free_cells -= 1
+
+                    stack[depth] = i
+                    depth += 1
+
+                    if depth == L:
+                        found = True
+                        break
+
+                    i += 1
+                else:
+                    if depth == 0:
+                        break
+
+                    depth -= 1
+                    i = stack[depth]
+                    x = i // N
+                    y = i % N
+                    counts[i] -= 1
+
+                    if counts[i] == 0:
+                        free_cells += 1
+
+                    for m in range(16):
+                        nx = x + _DX[m]
+                        ny = y + _DY[m]
+
+                        if 0 <= nx < N and 0 <= ny < N:
+                            s = nx * N + ny
+                            counts[s] -= 1
+
+                            if counts[s] == 0:
+                                free_cells += 1
+
+                    i += 1
+
+        if not found:
+            return None
+
+        return [(stack[d] // N, stack[d] % N) for d in range(L)]
+    finally:
+        c_free(counts)
+        c_free(stack)
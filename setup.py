@@ -0,0 +1,10 @@
+from setuptools import setup
+from Cython.Build import cythonize
+
+# Сборка ускоренного ядра перебора:
+#     python setup.py build_ext --inplace
+# Без собранного модуля приложение работает на numba или чистом Python.
+setup(
+    name='pony-solver',
+    ext_modules=cythonize('_solver.pyx'),
+)
@@ -1,389 +1,952 @@
-import sys
-from typing import List, Tuple, Optional
-
-from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QLineEdit, QPushButton,
-    QVBoxLayout, QHBoxLayout, QGraphicsScene, QGraphicsView, QGraphicsRectItem,
-    QMessageBox, QDialog, QLabel
-)
-
-from PySide6.QtCore import Qt, QRunnable, QThreadPool, Signal, QObject
-from PySide6.QtGui import QPen, QColor
-
-Coord = Tuple[int, int]
-
-# Ходы пони: конь + верблюд
-PONY_MOVES = (
-    (1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1),
-    (1, 3), (3, 1), (-1, 3), (-3, 1), (1, -3), (3, -1), (-1, -3), (-3, -1)
-)
-
-
-class Board:
-    """Класс, представляющий шахматную доску с размещенными пони."""
-
-    def __init__(self, size: int, occupied: List[Coord] = None):
-        if occupied is None:
-            occupied = []
-        self.size = size
-        self.occupied = list(occupied)
-
-    def attacked_positions(self) -> List[Coord]:
-        """
-        Возвращает список атакованных позиций на доске.
-
-        :return: Список координат (x, y), находящихся под атакой размещенных пони.
-        """
-        attacks = set()
-
-        for x0, y0 in self.occupied:
-            for dx, dy in PONY_MOVES:
-                x, y = x0 + dx, y0 + dy
-
-                if 0 <= x < self.size and 0 <= y < self.size:
-                    attacks.add((x, y))
-
-        return list(attacks)
-
-    def is_safe(self, pos: Coord) -> bool:
-        """
-        Проверяет, безопасна ли позиция для размещения нового пони.
-
-        :param pos: Координаты (x, y) для проверки
-
-        :return: True если позиция безопасна, False в противном случае
-
-        """
-        if pos in self.occupied:
-            return False
-
-        for occ in self.occupied:
-            dx = abs(pos[0] - occ[0])
-            dy = abs(pos[1] - occ[1])
-
-            if (dx, dy) in [(1, 2), (2, 1), (1, 3), (3, 1)]:
-                return False
-
-        return True
-
-    def place(self, pos: Coord):
-        """
-        Размещает пони на доске, если позиция безопасна.
-
-        :param pos: Координаты (x, y) для размещения
-
-        """
-        if self.is_safe(pos):
-            self.occupied.append(pos)
-
-
-# Бэктрекинг для поиска одного решения
-
-def find_one_solution(initial_coords: List[Coord], N: int, L: int) -> Optional[List[Coord]]:
-    """
-    Находит одно решение для размещения L пони на доске NxN с начальными координатами.
-
-    :param initial_coords: Начальные координаты размещенных пони
-
-    :param N: Размер доски
-
-    :param L: Количество дополнительных пони для размещения
-
-    :return: Список координат дополнительных пони или None, если решение не найдено
-
-    """
-    solution: List[Coord] = []
-
-    def backtrack(start: int, need: int, occ: List[Coord]) -> bool:
-        if need == 0:
-            solution.extend(occ[len(initial_coords):])
-            return True
-
-        for i in range(start, N * N):
-            x, y = divmod(i, N)
-
-            if Board(N, occ).is_safe((x, y)):
-                occ.append((x, y))
-
-                if backtrack(i + 1, need - 1, occ):
-                    return True
-
-                occ.pop()
-
-        return False
-
-    occ_copy = initial_coords.copy()
-    if backtrack(0, L, occ_copy):
-        return solution
-
-    return None
-
-
-class WorkerSignals(QObject):
-    """Сигналы для работы воркера."""
-    finished = Signal(object)
-
-
-class SolveRunnable(QRunnable):
-    """Задача для выполнения поиска решения в отдельном потоке."""
-
-    def __init__(self, initial: List[Coord], N: int, L: int):
-        super().__init__()
-
-        self.initial = initial
-        self.N = N
-        self.L = L
-        self.signals = WorkerSignals()
-
-    def run(self):
-        """Выполняет поиск решения и испускает сигнал с результатом."""
-        result = find_one_solution(self.initial, self.N, self.L)
-        self.signals.finished.emit(result)
-
-
-class CoordInputDialog(QDialog):
-    """Диалоговое окно для ввода координат пони."""
-
-    def __init__(self, K: int, board_size: int, parent=None):
-        super().__init__(parent)
-
-        self.setWindowTitle("Ввод координат")
-        self.setModal(True)
-        self.coords: List[Coord] = []
-        self.fields = []
-        layout = QVBoxLayout()
-
-        for i in range(K):
-            row = QHBoxLayout()
-            label = QLabel(f"Фигура {i + 1}:")
-            line = QLineEdit()
-            line.setPlaceholderText("x y")
-
-            row.addWidget(label)
-            row.addWidget(line)
-
-            layout.addLayout(row)
-            self.fields.append(line)
-            line.textChanged.connect(self.validate)
-
-        btn_layout = QHBoxLayout()
-        self.btnOk = QPushButton("OK")
-        self.btnOk.setEnabled(False)
-
-        btnCancel = QPushButton("Отмена")
-
-        btn_layout.addWidget(self.btnOk)
-        btn_layout.addWidget(btnCancel)
-        layout.addLayout(btn_layout)
-
-        self.setLayout(layout)
-        self.btnOk.clicked.connect(self.accept)
-        btnCancel.clicked.connect(self.reject)
-
-        self.board_size = board_size
-
-    def validate(self):
-        """Проверяет валидность введенных координат."""
-        valid = True
-        tmp: List[Coord] = []
-
-        for line in self.fields:
-            text = line.text().strip()
-            try:
-                x, y = map(int, text.split())
-                if not (0 <= x < self.board_size and 0 <= y < self.board_size):
-                    valid = False
-
-                tmp.append((x, y))
-            except:
-                valid = False
-
-        if valid:
-            for i in range(len(tmp)):
-                for j in range(i + 1, len(tmp)):
-                    dx = abs(tmp[i][0] - tmp[j][0])
-                    dy = abs(tmp[i][1] - tmp[j][1])
-
-                    if (dx, dy) in [(1, 2), (2, 1), (1, 3), (3, 1)]:
-                        valid = False
-                        break
-
-                if not valid:
-                    break
-
-        self.btnOk.setEnabled(valid)
-
-    def accept(self):
-        """Обрабатывает подтверждение ввода координат."""
-        self.coords = [tuple(map(int, line.text().split())) for line in self.fields]
-        super().accept()
-
-
-class BoardWindow(QMainWindow):
-    """Окно для отображения шахматной доски с пони."""
-
-    def __init__(self, board: Board, auto: List[Coord]):
-        super().__init__()
-
-        self.setWindowTitle("Доска")
-        self.board = board
-        self.auto = auto
-        self.scene = QGraphicsScene()
-        self.view = QGraphicsView(self.scene)
-        self.setCentralWidget(self.view)
-
-        self.draw_board()
-
-    def draw_board(self):
-        """Отрисовывает доску с пони и атакованными позициями."""
-        N = self.board.size
-        cell = 30
-        pen = QPen(Qt.black)
-
-        # рисуем сетку
-        for i in range(N):
-            for j in range(N):
-                rect = QGraphicsRectItem(j * cell, i * cell, cell, cell)
-                rect.setPen(pen)
-                rect.setBrush(Qt.white)
-
-                self.scene.addItem(rect)
-
-        # атакованные клетки
-        pen_attack = QPen(QColor(255, 0, 0), 2)
-        brush_attack = QColor(255, 200, 200, 100)
-        for x, y in self.board.attacked_positions():
-            rect = QGraphicsRectItem(y * cell, x * cell, cell, cell)
-            rect.setPen(pen_attack)
-            rect.setBrush(brush_attack)
-
-            self.scene.addItem(rect)
-
-        # пользовательские пони
-        for x, y in self.board.occupied:
-            rect = QGraphicsRectItem(y * cell, x * cell, cell, cell)
-            rect.setBrush(Qt.blue)
-            rect.setPen(pen)
-
-            self.scene.addItem(rect)
-
-        # автоматически расставленные пони
-        for x, y in self.auto:
-            rect = QGraphicsRectItem(y * cell, x * cell, cell, cell)
-            rect.setBrush(Qt.red)
-            rect.setPen(pen)
-
-            self.scene.addItem(rect)
-
-
-class MainWindow(QMainWindow):
-    """Главное окно приложения для размещения пони."""
-
-    def __init__(self):
-        super().__init__()
-
-        self.setWindowTitle("Размещение пони")
-        self.resize(400, 300)
-        self.user_coords: List[Coord] = []
-        self.board_window: Optional[BoardWindow] = None
-        self.thread_pool = QThreadPool.globalInstance()
-
-        # поля ввода
-        self.inputN = QLineEdit();
-        self.inputL = QLineEdit();
-        self.inputK = QLineEdit()
-        self.inputN.setPlaceholderText("Размер доски N")
-        self.inputL.setPlaceholderText("Автопони L")
-        self.inputK.setPlaceholderText("Польз. пони K")
-
-        # кнопки
-        self.btnCoords = QPushButton("Координаты");
-        self.btnDraw = QPushButton("Отрисовать");
-        self.btnExit = QPushButton("Выход")
-        self.btnCoords.setEnabled(False);
-        self.btnDraw.setEnabled(False)
-
-        # слой
-        layout = QVBoxLayout()
-        for w in [self.inputN, self.inputL, self.inputK, self.btnCoords, self.btnDraw, self.btnExit]:
-            layout.addWidget(w)
-
-        container = QWidget();
-        container.setLayout(layout)
-        self.setCentralWidget(container)
-
-        # сигналы
-        for inp in [self.inputN, self.inputL, self.inputK]:
-            inp.textChanged.connect(self.validate)
-
-        self.btnCoords.clicked.connect(self.open_coords_dialog)
-        self.btnDraw.clicked.connect(self.start_search)
-        self.btnExit.clicked.connect(self.close)
-
-    def validate(self):
-        """Проверяет валидность введенных параметров."""
-        N_ok = self.inputN.text().isdigit()
-        L_ok = self.inputL.text().isdigit()
-        K_ok = self.inputK.text().isdigit()
-
-        if N_ok and L_ok and K_ok:
-            N = int(self.inputN.text());
-            K = int(self.inputK.text())
-
-            self.btnCoords.setEnabled(K > 0)
-            self.btnDraw.setEnabled(K == 0 or len(self.user_coords) == K)
-        else:
-            self.btnCoords.setEnabled(False)
-            self.btnDraw.setEnabled(False)
-
-    def open_coords_dialog(self):
-        """Открывает диалог ввода координат пользовательских пони."""
-        K = int(self.inputK.text());
-        N = int(self.inputN.text())
-        dlg = CoordInputDialog(K, N, self)
-
-        if dlg.exec() == QDialog.Accepted:
-            self.user_coords = dlg.coords
-
-        self.validate()
-
-    def start_search(self):
-        """Запускает поиск решения в отдельном потоке."""
-        N = int(self.inputN.text());
-        L = int(self.inputL.text())
-        initial = self.user_coords.copy()
-        self.btnDraw.setEnabled(False)
-
-        worker = SolveRunnable(initial, N, L)
-        worker.signals.finished.connect(self.on_search_finished)
-
-        self.thread_pool.start(worker)
-
-    def on_search_finished(self, solution: Optional[List[Coord]]):
-        """
-        Обрабатывает завершение поиска решения.
-
-        :param solution: Найденное решение или None, если решение не найдено
-
-        """
-        if solution is None:
-            QMessageBox.warning(self, "Ошибка", "Нет решений для L пони")
-            self.btnDraw.setEnabled(True)
-            return
-
-        N = int(self.inputN.text())
-        board = Board(N, self.user_coords.copy())
-
-        for coord in solution:
-            board.place(coord)
-
-        self.board_window = BoardWindow(board, solution)
-        self.board_window.show()
-        self.btnDraw.setEnabled(True)
-
-
-if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    mw = MainWindow()
-    mw.show()
-    sys.exit(app.exec())
+import random
+import sys
+from typing import Dict, List, Tuple, Optional
+
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QLineEdit, QPushButton,
+    QVBoxLayout, QHBoxLayout, QGraphicsScene, QGraphicsView,
+    QMessageBox, QDialog, QLabel
+)
+
+from PySide6.QtCore import Qt, QRunnable, QThreadPool, Signal, QObject
+from PySide6.QtGui import QPen, QColor, QImage, QPainter, QPixmap
+
+# Опциональное ускорение: при наличии numba горячий цикл компилируется в
+# машинный код, иначе используется чистый Python
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+# Предпочтительная альтернатива numba: заранее собранное Cython-ядро
+# (python setup.py build_ext --inplace) без штрафа на первую компиляцию
+try:
+    import _solver
+except ImportError:
+    _solver = None
+
+Coord = Tuple[int, int]
+
+# Ходы пони: конь + верблюд
+PONY_MOVES = (
+    (1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1),
+    (1, 3), (3, 1), (-1, 3), (-3, 1), (1, -3), (3, -1), (-1, -3), (-3, -1)
+)
+
+# Конфликтные пары (|dx|, |dy|): константа вместо списка в каждом вызове
+_CONFLICTS = frozenset({(1, 2), (2, 1), (1, 3), (3, 1)})
+
+
+# Битовые маски атак: для клетки s = x*N+y биты маски отмечают клетки,
+# атакуемые пони с этой клетки; строятся лениво по размеру доски
+_ATTACK_MASKS = {}
+
+
+def _pony_attack_masks(N: int) -> Tuple[int, ...]:
+    """
+    Возвращает кортеж битовых масок атак для доски NxN.
+
+    :param N: Размер доски
+
+    :return: Кортеж из N*N целых, бит x*N+y означает атаку клетки (x, y)
+
+    """
+    masks = _ATTACK_MASKS.get(N)
+
+    if masks is None:
+        result = []
+
+        for x0 in range(N):
+            for y0 in range(N):
+                mask = 0
+
+                for dx, dy in PONY_MOVES:
+                    x, y = x0 + dx, y0 + dy
+
+                    if 0 <= x < N and 0 <= y < N:
+                        mask |= 1 << (x * N + y)
+
+                result.append(mask)
+
+        masks = tuple(result)
+        _ATTACK_MASKS[N] = masks
+
+    return masks
+
+
+# Ключи Зобриста для инкрементального хеширования множества занятых клеток;
+# сид фиксирован, чтобы хеши совпадали между запусками поиска
+_ZOBRIST_KEYS = {}
+
+
+def _zobrist_keys(N: int) -> Tuple[int, ...]:
+    """
+    Возвращает кортеж 64-битных ключей Зобриста для клеток доски NxN.
+
+    :param N: Размер доски
+
+    :return: Кортеж из N*N случайных ключей, индекс клетки — x*N+y
+
+    """
+    keys = _ZOBRIST_KEYS.get(N)
+
+    if keys is None:
+        rng = random.Random(0x504F4E59)
+        keys = tuple(rng.getrandbits(64) for _ in range(N * N))
+        _ZOBRIST_KEYS[N] = keys
+
+    return keys
+
+
+class Board:
+    """Класс, представляющий шахматную доску с размещенными пони."""
+
+    def __init__(self, size: int, occupied: List[Coord] = None):
+        if occupied is None:
+            occupied = []
+        self.size = size
+        self.occupied = list(occupied)
+        self._occupied_set = set(self.occupied)
+
+    @classmethod
+    def _unsafe_view(cls, size: int, occupied: List[Coord]) -> 'Board':
+        """
+        Создает доску поверх переданного списка занятых клеток без
+        защитного копирования.
+
+        :param size: Размер доски
+
+        :param occupied: Список занятых клеток; переходит во владение доски
+            и не должен изменяться вызывающим
+
+        :return: Доска, разделяющая переданный список
+
+        """
+        board = cls.__new__(cls)
+        board.size = size
+        board.occupied = occupied
+        board._occupied_set = set(occupied)
+
+        return board
+
+    def attacked_positions(self) -> List[Coord]:
+        """
+        Возвращает список атакованных позиций на доске.
+
+        :return: Список координат (x, y), находящихся под атакой размещенных пони.
+        """
+        attack = self.attack_mask()
+        attacks = []
+
+        while attack:
+            s = (attack & -attack).bit_length() - 1
+            attacks.append(divmod(s, self.size))
+            attack &= attack - 1
+
+        return attacks
+
+    def attack_mask(self) -> int:
+        """
+        Возвращает битовую маску всех атакованных клеток доски.
+
+        :return: Целое, бит x*N+y которого означает атаку клетки (x, y)
+
+        """
+        masks = _pony_attack_masks(self.size)
+        attack = 0
+
+        for x0, y0 in self.occupied:
+            attack |= masks[x0 * self.size + y0]
+
+        return attack
+
+    def is_safe(self, pos: Coord) -> bool:
+        """
+        Проверяет, безопасна ли позиция для размещения нового пони.
+
+        :param pos: Координаты (x, y) для проверки
+
+        :return: True если позиция безопасна, False в противном случае
+
+        """
+        if pos in self._occupied_set:
+            return False
+
+        return not (self.attack_mask() >> (pos[0] * self.size + pos[1])) & 1
+
+    def place(self, pos: Coord):
+        """
+        Размещает пони на доске, если позиция безопасна.
+
+        :param pos: Координаты (x, y) для размещения
+
+        """
+        if self.is_safe(pos):
+            self.occupied.append(pos)
+            self._occupied_set.add(pos)
+
+
+# Бэктрекинг для поиска одного решения
+
+if njit is not None:
+    _PONY_DX = np.array([m[0] for m in PONY_MOVES], dtype=np.int64)
+    _PONY_DY = np.array([m[1] for m in PONY_MOVES], dtype=np.int64)
+
+    # nogil: долгий поиск не должен блокировать GUI-поток и других воркеров
+    @njit(cache=True, nogil=True)
+    def _solve_kernel(init_x, init_y, N, L, out_x, out_y, restrict_first,
+                      root_lo, root_hi, cancel):
+        """
+        Итеративное ядро перебора: явный стек вместо рекурсии,
+        счетчик запретов на клетку вместо множества координат.
+
+        :return: True, если решение найдено (координаты в out_x/out_y)
+
+        """
+        size = N * N
+        one = np.uint64(1)
+
+        # counts[s] — сколько пони занимают или атакуют клетку s;
+        # mask — те же запреты, упакованные по 64 клетки в слово, так что
+        # проверка безопасности сводится к одному сдвигу и AND
+        counts = np.zeros(size, dtype=np.uint16)
+        mask = np.zeros((size + 63) // 64, dtype=np.uint64)
+
+        # число свободных (не занятых и не атакованных) клеток
+        free = size
+
+        for k in range(init_x.shape[0]):
+            s = init_x[k] * N + init_y[k]
+            counts[s] += 1
+
+            if counts[s] == 1:
+                mask[s >> 6] |= one << np.uint64(s & 63)
+                free -= 1
+
+            for m in range(16):
+                nx = init_x[k] + _PONY_DX[m]
+                ny = init_y[k] + _PONY_DY[m]
+
+                if 0 <= nx < N and 0 <= ny < N:
+                    s = nx * N + ny
+                    counts[s] += 1
+
+                    if counts[s] == 1:
+                        mask[s >> 6] |= one << np.uint64(s & 63)
+                        free -= 1
+
+        if L == 0:
+            return True
+
+        stack = np.empty(L, dtype=np.int64)
+        depth = 0
+        i = root_lo
+
+        while True:
+            if cancel[0] != 0:
+                return False
+
+            # оставшихся клеток должно хватить на недостающих пони
+            limit = size - L + depth + 1
+
+            # первый авто-пони ограничен своим диапазоном корней
+            if depth == 0 and limit > root_hi:
+                limit = root_hi
+
+            # свободных клеток меньше, чем недостающих пони — сразу откат
+            if free < L - depth:
+                i = limit
+
+            while i < limit:
+                if (mask[i >> 6] >> np.uint64(i & 63)) & one == np.uint64(0):
+                    # симметрия D4: первого пони достаточно искать
+                    # в левой верхней четверти доски
+                    if depth > 0 or not restrict_first:
+                        break
+
+                    if (i // N) * 2 <= N - 1 and (i % N) * 2 <= N - 1:
+                        break
+
+                i += 1
+
+            if i < limit:
+                x, y = i // N, i % N
+                counts[i] += 1
+
+                if counts[i] == 1:
+                    mask[i >> 6] |= one << np.uint64(i & 63)
+                    free -= 1
+
+                for m in range(16):
+                    nx = x + _PONY_DX[m]
+                    ny = y + _PONY_DY[m]
+
+                    if 0 <= nx < N and 0 <= ny < N:
+                        s = nx * N + ny
+                        counts[s] += 1
+
+                        if counts[s] == 1:
+                            mask[s >> 6] |= one << np.uint64(s & 63)
+                            free -= 1
+
+                stack[depth] = i
+                depth += 1
+
+                if depth == L:
+                    for d in range(L):
+                        out_x[d] = stack[d] // N
+                        out_y[d] = stack[d] % N
+
+                    return True
+
+                i += 1
+            else:
+                if depth == 0:
+                    return False
+
+                depth -= 1
+                i = stack[depth]
+                x, y = i // N, i % N
+                counts[i] -= 1
+
+                if counts[i] == 0:
+                    mask[i >> 6] &= ~(one << np.uint64(i & 63))
+                    free += 1
+
+                for m in range(16):
+                    nx = x + _PONY_DX[m]
+                    ny = y + _PONY_DY[m]
+
+                    if 0 <= nx < N and 0 <= ny < N:
+                        s = nx * N + ny
+                        counts[s] -= 1
+
+                        if counts[s] == 0:
+                            mask[s >> 6] &= ~(one << np.uint64(s & 63))
+                            free += 1
+
+                i += 1
+else:
+    _solve_kernel = None
+
+
+class CancelFlag:
+    """Флаг отмены поиска, разделяемый несколькими потоками."""
+
+    def __init__(self):
+        # массив из одного байта: его же опрашивает numba-ядро
+        self.flag = np.zeros(1, dtype=np.uint8) if np is not None else bytearray(1)
+
+    def set(self):
+        """Запрашивает остановку поиска."""
+        self.flag[0] = 1
+
+    def is_set(self) -> bool:
+        """Возвращает True, если остановка запрошена."""
+        return self.flag[0] != 0
+
+
+def find_one_solution(initial_coords: List[Coord], N: int, L: int,
+                      tt: Optional[Dict[int, int]] = None,
+                      roots: Optional[Tuple[int, int]] = None,
+                      cancel: Optional[CancelFlag] = None) -> Optional[List[Coord]]:
+    """
+    Находит одно решение для размещения L пони на доске NxN с начальными координатами.
+
+    :param initial_coords: Начальные координаты размещенных пони
+
+    :param N: Размер доски
+
+    :param L: Количество дополнительных пони для размещения
+
+    :param tt: Таблица транспозиций (хеш Зобриста -> минимальное число пони,
+        которое заведомо не удалось разместить); позволяет переиспользовать
+        неудачи между повторными запусками поиска
+
+    :param roots: Полуинтервал [lo, hi) клеток x*N+y, среди которых ищется
+        первый дополнительный пони; используется для разбиения корня
+        перебора между потоками
+
+    :param cancel: Флаг отмены; поиск прерывается, как только он выставлен
+
+    :return: Список координат дополнительных пони или None, если решение
+        не найдено или поиск был отменен
+
+    """
+    root_lo, root_hi = roots if roots is not None else (0, N * N)
+
+    if _solver is not None:
+        return _solver.solve(list(initial_coords), N, L,
+                             len(initial_coords) == 0, root_lo, root_hi,
+                             cancel.flag if cancel is not None else None)
+
+    if _solve_kernel is not None:
+        init_x = np.array([c[0] for c in initial_coords], dtype=np.int64)
+        init_y = np.array([c[1] for c in initial_coords], dtype=np.int64)
+        out_x = np.empty(L, dtype=np.int64)
+        out_y = np.empty(L, dtype=np.int64)
+        cancel_flag = cancel.flag if cancel is not None else np.zeros(1, dtype=np.uint8)
+
+        if _solve_kernel(init_x, init_y, N, L, out_x, out_y,
+                         len(initial_coords) == 0, root_lo, root_hi,
+                         cancel_flag):
+            return [(int(out_x[d]), int(out_y[d])) for d in range(L)]
+
+        return None
+
+    solution: List[Coord] = []
+    occ: List[Coord] = initial_coords.copy()
+    masks = _pony_attack_masks(N)
+    occupied = set(occ)
+
+    # Маска атакованных клеток и счетчик атакующих на каждую клетку:
+    # счетчик нужен, чтобы корректно снимать биты при откате,
+    # когда клетку атакуют несколько пони
+    attack_mask = 0
+    attack_count = [0] * (N * N)
+
+    # Маска занятых клеток — вместе с attack_mask дает быстрый подсчет
+    # оставшихся свободных клеток
+    occ_mask = 0
+
+    for x0, y0 in initial_coords:
+        occ_mask |= 1 << (x0 * N + y0)
+
+    # Симметрия D4: если начальных пони нет, первого достаточно искать
+    # в левой верхней четверти — любое решение переводится туда
+    # отражениями доски
+    restrict_first = not initial_coords
+
+    for x0, y0 in initial_coords:
+        m = masks[x0 * N + y0]
+        attack_mask |= m
+
+        while m:
+            attack_count[(m & -m).bit_length() - 1] += 1
+            m &= m - 1
+
+    # Хеш Зобриста текущего множества занятых клеток
+    zob = _zobrist_keys(N)
+    h = 0
+
+    for x0, y0 in initial_coords:
+        h ^= zob[x0 * N + y0]
+
+    if tt is None:
+        tt = {}
+
+    def backtrack(start: int, need: int) -> bool:
+        nonlocal attack_mask, occ_mask, h
+
+        if need == 0:
+            solution.extend(occ[len(initial_coords):])
+            return True
+
+        if cancel is not None and cancel.is_set():
+            return False
+
+        # ранее отсюда не удалось разместить даже меньшее число пони
+        if tt.get(h, L + 1) <= need:
+            return False
+
+        # оставшихся клеток меньше, чем нужно разместить
+        if need > N * N - start:
+            return False
+
+        # свободных клеток на всей доске меньше, чем нужно разместить
+        if N * N - bin(attack_mask | occ_mask).count('1') < need:
+            return False
+
+        x0, y0 = divmod(start, N)
+
+        # локальные псевдонимы: в самых горячих циклах LOAD_FAST
+        # вместо обращений к замыканию и глобальным именам
+        n = N
+        masks_l = masks
+        count_l = attack_count
+        occupied_l = occupied
+        amask = attack_mask
+        at_root = need == L
+
+        # кандидаты перебираются от сильнее всего ограничивающего:
+        # первой пробуется клетка, запрещающая больше всего новых клеток
+        candidates = []
+        add_candidate = candidates.append
+
+        for x in range(x0, n):
+            base = x * n
+
+            for y in range(y0 if x == x0 else 0, n):
+                pos = base + y
+
+                if (amask >> pos) & 1 or (x, y) in occupied_l:
+                    continue
+
+                if at_root:
+                    if restrict_first and not (
+                            x * 2 <= n - 1 and y * 2 <= n - 1):
+                        continue
+
+                    # первый авто-пони ограничен своим диапазоном корней
+                    if not root_lo <= pos < root_hi:
+                        continue
+
+                new_forbidden = bin(masks_l[pos] & ~amask).count('1')
+                add_candidate((-new_forbidden, pos))
+
+        # безопасных кандидатов меньше, чем недостающих пони; на корневом
+        # уровне список сужен только для первого пони, там проверка неверна
+        if need < L and len(candidates) < need:
+            return False
+
+        candidates.sort()
+
+        for _, pos in candidates:
+            x, y = divmod(pos, n)
+            m = masks_l[pos]
+
+            while m:
+                bit = m & -m
+                s = bit.bit_length() - 1
+
+                if count_l[s] == 0:
+                    attack_mask |= bit
+
+                count_l[s] += 1
+                m &= m - 1
+
+            occupied_l.add((x, y))
+            occ.append((x, y))
+            occ_mask |= 1 << pos
+            h ^= zob[pos]
+
+            if backtrack(pos + 1, need - 1):
+                return True
+
+            h ^= zob[pos]
+            occ_mask &= ~(1 << pos)
+            occ.pop()
+            occupied_l.remove((x, y))
+
+            m = masks_l[pos]
+
+            while m:
+                bit = m & -m
+                s = bit.bit_length() - 1
+                count_l[s] -= 1
+
+                if count_l[s] == 0:
+                    attack_mask &= ~bit
+
+                m &= m - 1
+
+        # запоминаем неудачу: need и большее число пони отсюда не разместить;
+        # при отмене перебор не был полным, и неудача не доказана
+        if cancel is None or not cancel.is_set():
+            prev = tt.get(h)
+
+            if prev is None or need < prev:
+                tt[h] = need
+
+        return False
+
+    if backtrack(0, L):
+        return solution
+
+    return None
+
+
+class WorkerSignals(QObject):
+    """Сигналы для работы воркера; вторым аргументом несут флаг партии."""
+    finished = Signal(object, object)
+    progress = Signal(int, object)
+
+
+class SolveRunnable(QRunnable):
+    """Задача для выполнения поиска решения в отдельном потоке."""
+
+    def __init__(self, initial: List[Coord], N: int, L: int,
+                 roots: Optional[Tuple[int, int]] = None,
+                 cancel: Optional[CancelFlag] = None):
+        super().__init__()
+
+        self.initial = initial
+        self.N = N
+        self.L = L
+        self.roots = roots
+        self.cancel = cancel
+        self.signals = WorkerSignals()
+
+    def run(self):
+        """Выполняет поиск решения итеративным углублением и испускает сигналы."""
+        result: Optional[List[Coord]] = []
+        tt: Dict[int, int] = {}
+
+        # итеративное углубление: размещаем 1, 2, ..., L пони; если не
+        # удается разместить l, то не удастся и L, а таблица транспозиций
+        # переиспользует доказанные неудачи между итерациями
+        for l in range(1, self.L + 1):
+            if self.cancel is not None and self.cancel.is_set():
+                result = None
+                break
+
+            result = find_one_solution(self.initial, self.N, l, tt=tt,
+                                       roots=self.roots, cancel=self.cancel)
+
+            if result is None:
+                break
+
+            self.signals.progress.emit(l, self.cancel)
+
+        self.signals.finished.emit(result, self.cancel)
+
+
+class CoordInputDialog(QDialog):
+    """Диалоговое окно для ввода координат пони."""
+
+    def __init__(self, K: int, board_size: int, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle("Ввод координат")
+        self.setModal(True)
+        self.coords: List[Coord] = []
+        self.fields = []
+
+        # разобранные координаты по полям и текущее число конфликтных пар;
+        # обновляются инкрементально при правке одного поля
+        self._parsed: List[Optional[Coord]] = [None] * K
+        self._conflict_count = 0
+
+        layout = QVBoxLayout()
+
+        for i in range(K):
+            row = QHBoxLayout()
+            label = QLabel(f"Фигура {i + 1}:")
+            line = QLineEdit()
+            line.setPlaceholderText("x y")
+
+            row.addWidget(label)
+            row.addWidget(line)
+
+            layout.addLayout(row)
+            self.fields.append(line)
+            line.textChanged.connect(lambda _text, index=i: self.validate(index))
+
+        btn_layout = QHBoxLayout()
+        self.btnOk = QPushButton("OK")
+        self.btnOk.setEnabled(False)
+
+        btnCancel = QPushButton("Отмена")
+
+        btn_layout.addWidget(self.btnOk)
+        btn_layout.addWidget(btnCancel)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+        self.btnOk.clicked.connect(self.accept)
+        btnCancel.clicked.connect(self.reject)
+
+        self.board_size = board_size
+
+    def validate(self, index: int):
+        """
+        Перепроверяет измененное поле и обновляет доступность кнопки OK.
+
+        :param index: Номер измененного поля
+
+        """
+        old = self._parsed[index]
+        parts = self.fields[index].text().split()
+        new = None
+
+        # разбор без исключений: во время набора поле чаще некорректно,
+        # и машинерия исключений на каждом нажатии заметно дороже;
+        # отрицательные координаты все равно вне доски
+        if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+            x, y = int(parts[0]), int(parts[1])
+
+            if x < self.board_size and y < self.board_size:
+                new = (x, y)
+
+        # пересчитываем только пары с измененным полем
+        for j, other in enumerate(self._parsed):
+            if j == index or other is None:
+                continue
+
+            if old is not None and (abs(old[0] - other[0]),
+                                    abs(old[1] - other[1])) in _CONFLICTS:
+                self._conflict_count -= 1
+
+            if new is not None and (abs(new[0] - other[0]),
+                                    abs(new[1] - other[1])) in _CONFLICTS:
+                self._conflict_count += 1
+
+        self._parsed[index] = new
+
+        valid = self._conflict_count == 0 and all(
+            p is not None for p in self._parsed)
+
+        self.btnOk.setEnabled(valid)
+
+    def accept(self):
+        """Обрабатывает подтверждение ввода координат."""
+        self.coords = [tuple(map(int, line.text().split())) for line in self.fields]
+        super().accept()
+
+
+class BoardWindow(QMainWindow):
+    """Окно для отображения шахматной доски с пони."""
+
+    def __init__(self, board: Board, auto: List[Coord]):
+        super().__init__()
+
+        self.setWindowTitle("Доска")
+        self.board = board
+        self.auto = auto
+        self.scene = QGraphicsScene()
+        self.view = QGraphicsView(self.scene)
+
+        # доска перерисовывается целиком: учет грязных прямоугольников
+        # по элементам только добавляет работы
+        self.view.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+
+        self.setCentralWidget(self.view)
+
+        self.draw_board()
+
+    def draw_board(self):
+        """Отрисовывает доску с пони и атакованными позициями."""
+        N = self.board.size
+        cell = 30
+
+        # сцена статична: BSP-индекс только замедляет массовое добавление
+        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+
+        # перья и кисти общие для всех элементов
+        pen = QPen(Qt.black)
+        pen_attack = QPen(QColor(255, 0, 0), 2)
+        brush_attack = QColor(255, 200, 200, 100)
+
+        # вся доска рисуется в одно изображение: сцена получает один
+        # pixmap вместо N*N отдельных прямоугольников
+        img = QImage(N * cell, N * cell, QImage.Format_ARGB32)
+        img.fill(Qt.white)
+
+        painter = QPainter(img)
+
+        # рисуем сетку
+        painter.setPen(pen)
+        for i in range(N):
+            for j in range(N):
+                painter.drawRect(j * cell, i * cell, cell, cell)
+
+        # атакованные клетки
+        painter.setPen(pen_attack)
+        for x, y in self.board.attacked_positions():
+            painter.fillRect(y * cell, x * cell, cell, cell, brush_attack)
+            painter.drawRect(y * cell, x * cell, cell, cell)
+
+        # пользовательские пони
+        painter.setPen(pen)
+        for x, y in self.board.occupied:
+            painter.fillRect(y * cell, x * cell, cell, cell, QColor(Qt.blue))
+            painter.drawRect(y * cell, x * cell, cell, cell)
+
+        # автоматически расставленные пони
+        for x, y in self.auto:
+            painter.fillRect(y * cell, x * cell, cell, cell, QColor(Qt.red))
+            painter.drawRect(y * cell, x * cell, cell, cell)
+
+        painter.end()
+        self.scene.addPixmap(QPixmap.fromImage(img))
+
+
+class MainWindow(QMainWindow):
+    """Главное окно приложения для размещения пони."""
+
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Размещение пони")
+        self.resize(400, 300)
+        self.user_coords: List[Coord] = []
+        self.board_window: Optional[BoardWindow] = None
+        self.thread_pool = QThreadPool.globalInstance()
+
+        # флаг отмены текущей партии воркеров; он же метка партии,
+        # по которой отбрасываются сигналы отмененных поисков
+        self._cancel: Optional[CancelFlag] = None
+
+        # поля ввода
+        self.inputN = QLineEdit();
+        self.inputL = QLineEdit();
+        self.inputK = QLineEdit()
+        self.inputN.setPlaceholderText("Размер доски N")
+        self.inputL.setPlaceholderText("Автопони L")
+        self.inputK.setPlaceholderText("Польз. пони K")
+
+        # кнопки
+        self.btnCoords = QPushButton("Координаты");
+        self.btnDraw = QPushButton("Отрисовать");
+        self.btnExit = QPushButton("Выход")
+        self.btnCoords.setEnabled(False);
+        self.btnDraw.setEnabled(False)
+
+        # слой
+        layout = QVBoxLayout()
+        for w in [self.inputN, self.inputL, self.inputK, self.btnCoords, self.btnDraw, self.btnExit]:
+            layout.addWidget(w)
+
+        container = QWidget();
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+        # сигналы
+        for inp in [self.inputN, self.inputL, self.inputK]:
+            inp.textChanged.connect(self.validate)
+
+        self.btnCoords.clicked.connect(self.open_coords_dialog)
+        self.btnDraw.clicked.connect(self.start_search)
+        self.btnExit.clicked.connect(self.close)
+
+    def validate(self):
+        """Проверяет валидность введенных параметров."""
+        N_ok = self.inputN.text().isdigit()
+        L_ok = self.inputL.text().isdigit()
+        K_ok = self.inputK.text().isdigit()
+
+        if N_ok and L_ok and K_ok:
+            N = int(self.inputN.text());
+            K = int(self.inputK.text())
+
+            self.btnCoords.setEnabled(K > 0)
+            self.btnDraw.setEnabled(K == 0 or len(self.user_coords) == K)
+        else:
+            self.btnCoords.setEnabled(False)
+            self.btnDraw.setEnabled(False)
+
+    def open_coords_dialog(self):
+        """Открывает диалог ввода координат пользовательских пони."""
+        K = int(self.inputK.text());
+        N = int(self.inputN.text())
+        dlg = CoordInputDialog(K, N, self)
+
+        if dlg.exec() == QDialog.Accepted:
+            self.user_coords = dlg.coords
+
+        self.validate()
+
+    def start_search(self):
+        """Запускает поиск решения, разбивая корень перебора между потоками."""
+        N = int(self.inputN.text());
+        L = int(self.inputL.text())
+        initial = self.user_coords.copy()
+        self.btnDraw.setEnabled(False)
+
+        # каждый воркер ищет решения со своим диапазоном первой клетки;
+        # побеждает первый найденный результат, остальные отменяются
+        self._cancel = CancelFlag()
+        self._solution = None
+        self._pending = 0
+        self._progress = 0
+        self._target = L
+
+        size = N * N
+        workers = max(1, min(self.thread_pool.maxThreadCount(), size))
+
+        for w in range(workers):
+            lo = size * w // workers
+            hi = size * (w + 1) // workers
+
+            if lo == hi:
+                continue
+
+            worker = SolveRunnable(initial, N, L, roots=(lo, hi),
+                                   cancel=self._cancel)
+
+            # слоты подключаются связанными методами: очередь событий
+            # переживает автоудаление воркера пулом, а флаг партии
+            # приходит в самом сигнале
+            worker.signals.finished.connect(self.on_worker_finished)
+            worker.signals.progress.connect(self.on_worker_progress)
+
+            self._pending += 1
+            self.thread_pool.start(worker)
+
+        # доска без клеток (N=0): воркеры не запускались, отвечаем сразу,
+        # как это делал одиночный воркер — пустым решением или отказом
+        if self._pending == 0:
+            self.on_search_finished([] if L == 0 else None)
+
+    def on_worker_progress(self, placed: int, flag: CancelFlag):
+        """
+        Показывает, сколько пони уже удалось разместить при углублении.
+
+        :param placed: Достигнутая глубина одного из воркеров
+
+        :param flag: Флаг партии воркера; сигналы чужой партии игнорируются
+
+        """
+        if flag is not self._cancel:
+            return
+
+        if placed > self._progress:
+            self._progress = placed
+            self.statusBar().showMessage(
+                f"Размещено {placed} из {self._target} пони...")
+
+    def on_worker_finished(self, solution: Optional[List[Coord]],
+                           flag: CancelFlag):
+        """
+        Собирает результаты воркеров: первый успех отменяет остальных.
+
+        :param solution: Результат одного воркера или None
+
+        :param flag: Флаг партии воркера; сигналы чужой партии игнорируются
+
+        """
+        if flag is not self._cancel:
+            return
+
+        self._pending -= 1
+
+        if solution is not None:
+            if self._solution is None:
+                self._solution = solution
+                self._cancel.set()
+                self.on_search_finished(solution)
+        elif self._pending == 0 and self._solution is None:
+            self.on_search_finished(None)
+
+    def on_search_finished(self, solution: Optional[List[Coord]]):
+        """
+        Обрабатывает завершение поиска решения.
+
+        :param solution: Найденное решение или None, если решение не найдено
+
+        """
+        self.statusBar().clearMessage()
+
+        if solution is None:
+            QMessageBox.warning(self, "Ошибка", "Нет решений для L пони")
+            self.btnDraw.setEnabled(True)
+            return
+
+        N = int(self.inputN.text())
+        board = Board._unsafe_view(N, self.user_coords.copy())
+
+        for coord in solution:
+            board.place(coord)
+
+        self.board_window = BoardWindow(board, solution)
+        self.board_window.show()
+        self.btnDraw.setEnabled(True)
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    mw.show()
+    sys.exit(app.exec())